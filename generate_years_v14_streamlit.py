@@ -8,112 +8,119 @@ Features formatted Excel output with colored cells for seasons, and CSV output.
 """
 
 import streamlit as st
-import csv
 import re
 import io
+from bisect import bisect_right
 from datetime import datetime
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font
 from openpyxl.utils import get_column_letter
 
 
-def get_japanese_era(year, month):
+MIN_BIRTH_YEAR = 1868
+MAX_BIRTH_YEAR = 2100
+
+_NAME_SANITIZER = re.compile(r'[^a-zA-Z0-9_-]')
+
+CHRONOLOGY_HEADER = ('Year', 'Age', 'Season', 'Month', 'Japanese Era', 'Chinese Zodiac', 'Western Zodiac')
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December')
+
+SEASON_BY_MONTH_IDX = ('winter', 'winter', 'spring', 'spring', 'spring', 'summer',
+                       'summer', 'summer', 'autumn', 'autumn', 'autumn', 'winter')
+
+WESTERN_ZODIAC_BY_MONTH_IDX = ('Capricorn/Aquarius', 'Aquarius/Pisces', 'Pisces/Aries',
+                               'Aries/Taurus', 'Taurus/Gemini', 'Gemini/Cancer',
+                               'Cancer/Leo', 'Leo/Virgo', 'Virgo/Libra',
+                               'Libra/Scorpio', 'Scorpio/Sagittarius', 'Sagittarius/Capricorn')
+
+ZODIAC_ANIMALS = ('Rat', 'Ox', 'Tiger', 'Rabbit', 'Dragon', 'Snake',
+                  'Horse', 'Goat', 'Monkey', 'Rooster', 'Dog', 'Wild Boar')
+
+# "Animal Year N" for each position in the 12-year cycle, counted from 1900 (Rat)
+CHINESE_ZODIAC_LABELS = tuple(
+    f"{animal} Year {idx}" for idx, animal in enumerate(ZODIAC_ANIMALS, start=1)
+)
+
+# Shared fills: openpyxl registers a cell's fill by hashing it, which is much
+# cheaper when every styled cell reuses the same instance
+SPRING_FILL = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # Green - theme 9 with tint
+AUTUMN_FILL = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # Light red - theme 5 with tint
+
+# Spring and autumn months are shaded; summer and winter months have no fill
+MONTH_FILLS = {
+    'March': SPRING_FILL, 'April': SPRING_FILL, 'May': SPRING_FILL,
+    'September': AUTUMN_FILL, 'October': AUTUMN_FILL, 'November': AUTUMN_FILL,
+}
+
+# Longest value in each column + 2: "Year", "100", "Season", "September",
+# "Japanese Era", "Wild Boar Year 12", "Sagittarius/Capricorn"
+EXCEL_COLUMN_WIDTHS = (6, 5, 8, 11, 14, 19, 23)
+
+
+# Era start months as year * 12 + month, with the year before each era's first year
+_ERA_BOUNDS = [
+    (1868 * 12 + 9, 'Meiji', 1867),     # September 1868
+    (1912 * 12 + 8, 'Taisho', 1911),    # August 1912
+    (1926 * 12 + 13, 'Showa', 1925),    # January 1927 (1926 is counted as Taisho 15)
+    (1989 * 12 + 2, 'Heisei', 1988),    # February 1989
+    (2019 * 12 + 5, 'Reiwa', 2018),     # May 2019
+]
+_ERA_KEYS = [key for key, _, _ in _ERA_BOUNDS]
+
+
+def get_japanese_era(year, month_idx):
     """
-    Returns the Japanese era name and reign year based on the year and month.
+    Returns the Japanese era name and reign year based on the year and month index (0 = January).
     Format: "Era Name Year" (e.g., "Showa 38", "Heisei 1")
     Modern eras: Meiji, Taisho, Showa, Heisei, Reiwa
     """
-    month_num = {
-        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-        'September': 9, 'October': 10, 'November': 11, 'December': 12
-    }
-    
-    m = month_num[month]
-    
-    # Modern Japanese eras with exact dates and reign years
-    if year < 1868:
+    i = bisect_right(_ERA_KEYS, year * 12 + month_idx + 1) - 1
+    if i < 0:
         return "Pre-Meiji"
-    elif year == 1868:
-        if m < 9:
-            return "Pre-Meiji"
-        else:
-            return "Meiji 1"
-    elif year <= 1911:
-        era_year = year - 1867
-        return f"Meiji {era_year}"
-    elif year == 1912:
-        if m <= 7:
-            era_year = year - 1867
-            return f"Meiji {era_year}"
-        else:
-            return "Taisho 1"
-    elif year <= 1925:
-        era_year = year - 1911
-        return f"Taisho {era_year}"
-    elif year == 1926:
-        if m <= 12:
-            era_year = year - 1911
-            return f"Taisho {era_year}"
-        else:
-            return "Showa 1"
-    elif year <= 1988:
-        era_year = year - 1925
-        return f"Showa {era_year}"
-    elif year == 1989:
-        if m <= 1:
-            era_year = year - 1925
-            return f"Showa {era_year}"
-        else:
-            return "Heisei 1"
-    elif year <= 2018:
-        era_year = year - 1988
-        return f"Heisei {era_year}"
-    elif year == 2019:
-        if m <= 4:
-            era_year = year - 1988
-            return f"Heisei {era_year}"
-        else:
-            return "Reiwa 1"
-    else:
-        era_year = year - 2018
-        return f"Reiwa {era_year}"
+    
+    _, era_name, base_year = _ERA_BOUNDS[i]
+    return f"{era_name} {year - base_year}"
 
 
-def get_chinese_zodiac(year, month):
+def get_chinese_zodiac(year, month_idx):
     """
-    Returns the Chinese zodiac animal based on the year and month.
+    Returns the Chinese zodiac animal based on the year and month index (0 = January).
     """
-    zodiac_animals = ['Rat', 'Ox', 'Tiger', 'Rabbit', 'Dragon', 'Snake',
-                      'Horse', 'Goat', 'Monkey', 'Rooster', 'Dog', 'Wild Boar']
-    
-    zodiac_index = (year - 1900) % 12
-    zodiac_animal = zodiac_animals[zodiac_index]
-    zodiac_year = zodiac_index + 1
-    
-    return f"{zodiac_animal} Year {zodiac_year}"
+    return CHINESE_ZODIAC_LABELS[(year - 1900) % 12]
 
 
-def get_western_zodiac(month):
+def get_western_zodiac(month_idx):
     """
-    Returns the Western zodiac sign based on the month.
+    Returns the Western zodiac sign based on the month index (0 = January).
     """
-    western_zodiac = {
-        'January': 'Capricorn/Aquarius',
-        'February': 'Aquarius/Pisces',
-        'March': 'Pisces/Aries',
-        'April': 'Aries/Taurus',
-        'May': 'Taurus/Gemini',
-        'June': 'Gemini/Cancer',
-        'July': 'Cancer/Leo',
-        'August': 'Leo/Virgo',
-        'September': 'Virgo/Libra',
-        'October': 'Libra/Scorpio',
-        'November': 'Scorpio/Sagittarius',
-        'December': 'Sagittarius/Capricorn'
-    }
-    
-    return western_zodiac.get(month, 'Unknown')
+    return WESTERN_ZODIAC_BY_MONTH_IDX[month_idx]
+
+
+# Years of life covered by a chronology (birth year through age 100)
+YEARS_COVERED = 101
+
+@st.cache_resource(show_spinner=False)
+def month_table():
+    """
+    Returns (ages, months) for building chronologies, computed once per process.
+    months holds (year, season, month, era, Chinese zodiac, Western zodiac) for
+    every month the app can emit (birth years MIN_BIRTH_YEAR..MAX_BIRTH_YEAR plus
+    100 years), so a chronology is a slice of it; ages is the age for each month
+    of a chronology. Streamlit re-runs this script on every interaction, so the
+    table is cached as a resource rather than built at module level.
+    """
+    months = [
+        (year, SEASON_BY_MONTH_IDX[month_idx], MONTH_NAMES[month_idx],
+         get_japanese_era(year, month_idx), get_chinese_zodiac(year, month_idx),
+         get_western_zodiac(month_idx))
+        for year in range(MIN_BIRTH_YEAR, MAX_BIRTH_YEAR + YEARS_COVERED + 1)
+        for month_idx in range(12)
+    ]
+    ages = tuple(month_count // 12 for month_count in range(YEARS_COVERED * 12))
+    return ages, months
 
 
 def get_month_fill(month):
@@ -123,149 +130,108 @@ def get_month_fill(month):
     Autumn months (September, October, November): Light Red
     Summer and Winter months: No fill
     """
-    spring_months = ['March', 'April', 'May']
-    autumn_months = ['September', 'October', 'November']
+    return MONTH_FILLS.get(month)
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def build_chronology(birth_year, birth_month):
+    """
+    Builds the data rows for a birth year and month as a tuple of tuples.
+    Only the birth date affects the rows, so results are cached across reruns
+    and shared between users with the same birth date.
+    """
+    ages, months = month_table()
+    start = (birth_year - MIN_BIRTH_YEAR) * 12 + MONTH_NAMES.index(birth_month)
+    months = months[start:start + len(ages)]
     
-    if month in spring_months:
-        # Green fill - theme 9 with tint
-        return PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    elif month in autumn_months:
-        # Light red fill - theme 5 with tint
-        return PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    else:
-        # No fill for summer and winter
-        return None
+    return tuple(
+        (year, age, season, month, japanese_era, chinese_zodiac, western_zodiac)
+        for age, (year, season, month, japanese_era, chinese_zodiac, western_zodiac)
+        in zip(ages, months)
+    )
 
 
 def generate_data(name, birth_year, birth_month):
     """
-    Generates the data rows and returns them along with sanitized name.
+    Generates the data rows (without header) and returns them along with sanitized name.
     This is used by both CSV and Excel generation functions.
     """
-    sanitized_name = re.sub(r'[^a-zA-Z0-9_-]', '_', name).lower()
-    end_year = birth_year + 100
-    
-    season_map = {
-        'January': 'winter',
-        'February': 'winter',
-        'March': 'spring',
-        'April': 'spring',
-        'May': 'spring',
-        'June': 'summer',
-        'July': 'summer',
-        'August': 'summer',
-        'September': 'autumn',
-        'October': 'autumn',
-        'November': 'autumn',
-        'December': 'winter',
-    }
-    
-    months = ['January', 'February', 'March', 'April', 'May', 'June',
-              'July', 'August', 'September', 'October', 'November', 'December']
-    
-    birth_month_index = months.index(birth_month)
-    rotated_months = months[birth_month_index:] + months[:birth_month_index]
-    
-    # Store all rows
-    all_rows = []
-    
-    # Write header
-    header = ['Year', 'Age', 'Season', 'Month', 'Japanese Era', 'Chinese Zodiac', 'Western Zodiac']
-    all_rows.append(header)
-    
-    current_year = birth_year
-    month_count = 0
-    total_months = (end_year - birth_year + 1) * 12
-    
-    while month_count < total_months:
-        years_passed = month_count // 12
-        age = years_passed
-        
-        month_index = month_count % 12
-        month = rotated_months[month_index]
-        season = season_map[month]
-        
-        japanese_era = get_japanese_era(current_year, month)
-        chinese_zodiac = get_chinese_zodiac(current_year, month)
-        western_zodiac = get_western_zodiac(month)
-        
-        row = [current_year, age, season, month, japanese_era, chinese_zodiac, western_zodiac]
-        all_rows.append(row)
-        
-        if month == 'December':
-            current_year += 1
-        
-        month_count += 1
-    
-    return sanitized_name, all_rows
+    sanitized_name = _NAME_SANITIZER.sub('_', name).lower()
+    return sanitized_name, build_chronology(birth_year, birth_month)
 
 
-def generate_csv(sanitized_name, all_rows):
+def iter_csv_lines(rows):
     """
-    Generates CSV data in memory and returns it as a string.
+    Yields the CSV text one line at a time, header first.
+    Every field is plain ASCII with no commas, quotes or newlines, so rows are
+    formatted directly rather than through csv.writer (same output, CRLF endings).
     """
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    for row in all_rows:
-        writer.writerow(row)
-    
-    csv_data = output.getvalue()
-    output.close()
-    
-    return csv_data
+    yield ','.join(CHRONOLOGY_HEADER) + '\r\n'
+    for year, age, season, month, era, chinese, western in rows:
+        yield f"{year},{age},{season},{month},{era},{chinese},{western}\r\n"
+
 
+def generate_csv(sanitized_name, rows):
+    """
+    Generates CSV data in memory and returns it as bytes ready for download.
+    """
+    return ''.join(iter_csv_lines(rows)).encode('ascii')
 
-def generate_excel(sanitized_name, all_rows):
+
+def generate_excel(sanitized_name, rows):
     """
     Generates Excel file in memory and returns it as bytes.
+    Uses a write-only workbook, which streams rows straight to the sheet XML.
     """
     # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"{sanitized_name}_chronology"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(f"{sanitized_name}_chronology")
     
-    # Write header
-    header = all_rows[0]
-    ws.append(header)
+    # Column widths must be set before any rows are written
+    for col_idx, width in enumerate(EXCEL_COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
     
-    # Style header row
+    # Write header in bold
     header_font = Font(bold=True)
-    for cell in ws[1]:
+    header_cells = []
+    for value in CHRONOLOGY_HEADER:
+        cell = WriteOnlyCell(ws, value=value)
         cell.font = header_font
+        header_cells.append(cell)
+    ws.append(header_cells)
     
     # Write data rows
-    for row_idx, row in enumerate(all_rows[1:], start=2):
-        ws.append(row)
-        
+    for row in rows:
         # Apply formatting to the row based on month
         month = row[3]  # Month is in column D (index 3)
         fill = get_month_fill(month)
         if fill:
             # Apply fill to entire row
-            for col in range(1, 8):
-                cell = ws.cell(row=row_idx, column=col)
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(ws, value=value)
                 cell.fill = fill
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+                cells.append(cell)
+            ws.append(cells)
+        else:
+            ws.append(row)
     
     # Save to BytesIO
     excel_buffer = io.BytesIO()
     wb.save(excel_buffer)
-    excel_buffer.seek(0)
     
-    return excel_buffer
+    return excel_buffer.getvalue()
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def build_downloads(sanitized_name, birth_year, birth_month):
+    """
+    Builds the CSV and Excel downloads and returns them as a pair of bytes.
+    Cached on the name and birth date rather than on the rows, which take
+    Streamlit longer to hash than the CSV takes to build.
+    """
+    rows = build_chronology(birth_year, birth_month)
+    return generate_csv(sanitized_name, rows), generate_excel(sanitized_name, rows)
 
 
 def main():
@@ -280,12 +246,10 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        birth_year = st.number_input("**Birth year:**", min_value=1868, max_value=2100, value=1990, step=1)
+        birth_year = st.number_input("**Birth year:**", min_value=MIN_BIRTH_YEAR, max_value=MAX_BIRTH_YEAR, value=1990, step=1)
     
     with col2:
-        months = ['January', 'February', 'March', 'April', 'May', 'June',
-                  'July', 'August', 'September', 'October', 'November', 'December']
-        birth_month = st.selectbox("**Birth month:**", months)
+        birth_month = st.selectbox("**Birth month:**", MONTH_NAMES)
     
     # Generate button
     if st.button("🚀 Generate Chronology", type="primary", use_container_width=True):
@@ -293,28 +257,28 @@ def main():
             st.error("⚠️ Please enter your name")
         else:
             with st.spinner("Generating..."):
-                sanitized_name, all_rows = generate_data(name, birth_year, birth_month)
+                sanitized_name, rows = generate_data(name, birth_year, birth_month)
                 
                 st.success(f"✅ **Files Generated Successfully for {name}!**")
                 
                 # Show stats
-                end_year = birth_year + 100
-                total_rows = len(all_rows) - 1
-                st.info(f"📊 Covering {end_year - birth_year + 1} years ({total_rows} rows)")
+                total_rows = len(rows)
+                st.info(f"📊 Covering {YEARS_COVERED} years ({total_rows} rows)")
                 
                 st.markdown("---")
                 
                 # Download section with both formats
                 st.markdown("### 📥 Download Your Files")
                 
+                csv_bytes, xlsx_bytes = build_downloads(sanitized_name, birth_year, birth_month)
+                
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    csv_data = generate_csv(sanitized_name, all_rows)
                     csv_filename = f"{sanitized_name}_chronology.csv"
                     st.download_button(
                         label="⬇️ DOWNLOAD CSV",
-                        data=csv_data,
+                        data=csv_bytes,
                         file_name=csv_filename,
                         mime="text/csv",
                         use_container_width=True,
@@ -322,11 +286,10 @@ def main():
                     )
                 
                 with col2:
-                    excel_buffer = generate_excel(sanitized_name, all_rows)
                     xlsx_filename = f"{sanitized_name}_chronology.xlsx"
                     st.download_button(
                         label="⬇️ DOWNLOAD XLSX",
-                        data=excel_buffer.getvalue(),
+                        data=xlsx_bytes,
                         file_name=xlsx_filename,
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True,
@@ -345,35 +308,28 @@ def main():
                 
                 # Show first 5 rows
                 st.markdown("**First 5 rows:**")
-                preview_first = all_rows[:6]
-                for row in preview_first:
-                    st.text(', '.join(map(str, row)))
+                preview_first = (CHRONOLOGY_HEADER, *rows[:5])
+                st.code('\n'.join(', '.join(map(str, row)) for row in preview_first), language=None)
                 
                 st.markdown("**...**")
                 
                 # Show last 3 rows up to present day
-                current_year = datetime.now().year
-                current_month = datetime.now().month
-                month_names = ['January', 'February', 'March', 'April', 'May', 'June',
-                              'July', 'August', 'September', 'October', 'November', 'December']
-                current_month_name = month_names[current_month - 1]
+                today = datetime.now()
+                current_year = today.year
+                current_month_name = MONTH_NAMES[today.month - 1]
                 
                 st.markdown(f"**Last 3 rows (up to {current_month_name} {current_year}):**")
                 
-                # Find rows up to present day
-                present_day_rows = []
-                for row in all_rows[1:]:
-                    if row[0] <= current_year:
-                        present_day_rows.append(row)
+                # Rows run month by month from the birth month, so the number of
+                # rows up to December of the current year follows directly
+                present_day_count = (current_year - birth_year) * 12 + 12 - MONTH_NAMES.index(birth_month)
+                present_day_count = min(max(present_day_count, 0), len(rows))
                 
                 # Show last 3 rows
-                if len(present_day_rows) > 3:
-                    preview_last = present_day_rows[-3:]
-                else:
-                    preview_last = present_day_rows
+                preview_last = rows[max(0, present_day_count - 3):present_day_count]
                 
-                for row in preview_last:
-                    st.text(', '.join(map(str, row)))
+                if preview_last:
+                    st.code('\n'.join(', '.join(map(str, row)) for row in preview_last), language=None)
     
     # Compact info at bottom
     with st.expander("ℹ️ About"):
@@ -4,21 +4,25 @@ Streamlit app: upload PNG/JPEG images and merge them into a single PDF for downl
 import streamlit as st
 
 try:
-    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab import rl_config
     from reportlab.lib.pagesizes import letter
     from reportlab.lib.utils import ImageReader
     from reportlab.pdfgen import canvas
     from reportlab.lib.units import inch
     from PIL import Image, ImageOps
-    from PIL.ExifTags import TAGS
     DEPENDENCIES_AVAILABLE = True
 except ImportError as e:
     DEPENDENCIES_AVAILABLE = False
     MISSING_PACKAGE = str(e)
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
 import io
-import time
+import math
+import os
+import re
 
 if not DEPENDENCIES_AVAILABLE:
     st.error("⚠️ Missing Required Packages")
@@ -26,36 +30,71 @@ if not DEPENDENCIES_AVAILABLE:
     This app requires additional packages. Install with:
 
     ```bash
-    pip install PyPDF2 reportlab Pillow
+    pip install reportlab Pillow
     ```
     """)
     st.stop()
 
+# Write image streams as raw binary; ReportLab's default ASCII85 text encoding
+# makes them 25% larger and is slow to compute
+rl_config.useA85 = 0
+
+# Pillow releases the GIL while decoding and resampling, so threads overlap that work
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# EXIF tag IDs, looked up directly instead of scanning every tag by name.
+# DateTimeOriginal/DateTimeDigitized live in the Exif sub-IFD; DateTime, Artist and
+# Copyright in the main IFD.
+EXIF_IFD_POINTER = 0x8769
+EXIF_SUB_IFD_DATE_TAGS = (0x9003, 0x9004)
+EXIF_DATETIME_TAG = 0x0132
+EXIF_AUTHOR_TAGS = (0x013B, 0x8298)
+
+# EXIF timestamps: "YYYY:MM:DD HH:MM:SS"
+_EXIF_DATE_RE = re.compile(r"(\d{4}):(\d{2}):(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def upload_hash(file_id, _uploaded_file):
+    """SHA-256 of an uploaded file's bytes; cached per upload so reruns don't rehash it."""
+    return hashlib.sha256(_uploaded_file.getvalue()).hexdigest()
+
 
 def extract_image_metadata(image_file, filename):
     """Extract metadata from image (JPEG or PNG)."""
-    try:
-        image_file.seek(0)
-        image_bytes = image_file.read()
-        image_file.seek(0)
+    image_bytes = image_file.getvalue()
+    content_hash = upload_hash(image_file.file_id, image_file)
+    info = _extract_image_metadata(image_bytes, filename, content_hash)
+    if "error" in info:
+        return info
+    return {**info, "file_bytes": image_bytes, "hash": content_hash}
 
-        image = Image.open(io.BytesIO(image_bytes))
+
+@st.cache_data(show_spinner=False)
+def _extract_image_metadata(_image_bytes, filename, content_hash):
+    """Extract metadata from image bytes; cached by content hash so re-uploads skip parsing."""
+    try:
+        image = Image.open(io.BytesIO(_image_bytes))
 
         date = None
         author = None
         exif_data = image.getexif() if hasattr(image, "getexif") else None
 
         if exif_data:
-            for tag_id, value in exif_data.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag in ("DateTime", "DateTimeOriginal", "DateTimeDigitized"):
+            exif_ifd = exif_data.get_ifd(EXIF_IFD_POINTER)
+            date_values = [exif_ifd.get(tag) for tag in EXIF_SUB_IFD_DATE_TAGS]
+            date_values.append(exif_data.get(EXIF_DATETIME_TAG))
+            for value in date_values:
+                match = _EXIF_DATE_RE.fullmatch(str(value)) if value else None
+                if match:
                     try:
-                        date = datetime.strptime(str(value), "%Y:%m:%d %H:%M:%S")
+                        date = datetime(*map(int, match.groups()))
                         break
-                    except Exception:
+                    except ValueError:
                         pass
-                if tag in ("Artist", "Copyright") and value:
-                    author = str(value)
+            for tag in EXIF_AUTHOR_TAGS:
+                if exif_data.get(tag):
+                    author = str(exif_data[tag])
+                    break
 
         width, height = image.size
         return {
@@ -64,7 +103,6 @@ def extract_image_metadata(image_file, filename):
             "author": author or "—",
             "date": date,
             "pages": 1,
-            "file_bytes": image_bytes,
             "filename": filename,
             "width": width,
             "height": height,
@@ -73,10 +111,8 @@ def extract_image_metadata(image_file, filename):
         return {"error": str(e), "filename": filename}
 
 
-def create_cover_page(file_info_list, generation_date):
-    """Create a cover page PDF listing the images."""
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
+def draw_cover_page(c, file_info_list, generation_date):
+    """Draw the cover page(s) listing the images onto canvas c."""
     width, height = letter
 
     c.setFont("Helvetica-Bold", 24)
@@ -114,15 +150,75 @@ def create_cover_page(file_info_list, generation_date):
         y_position -= 0.35 * inch
         c.setFont("Helvetica", 10)
 
-    c.save()
-    buffer.seek(0)
-    return buffer
+    c.showPage()
+
+
+# Resolution that decoded JPEGs are allowed to be reduced to on the page
+DRAFT_DPI = 300
+
+# EXIF orientation value -> counter-clockwise rotation (degrees) that makes the image upright.
+# Mirrored orientations (2, 4, 5, 7) are left to ImageOps.exif_transpose.
+EXIF_ORIENTATION_TAG = 0x0112
+JPEG_ROTATIONS = {1: 0, 3: 180, 6: -90, 8: 90}
+
+
+class JpegPassthroughReader(ImageReader):
+    """ImageReader for JPEG bytes that ReportLab embeds verbatim.
+
+    drawImage fingerprints ImageReader sources with getRGBData(), which decodes
+    every pixel; the compressed bytes identify the image just as well.
+    """
+
+    def getRGBData(self):
+        self._dataA = None
+        return self.fp.getvalue()
+
 
+def draw_jpeg_page(c, image, image_bytes):
+    """Draw an RGB/grayscale JPEG as a page of canvas c by embedding its original bytes.
 
-def image_to_pdf_page(image_bytes):
-    """Convert one image (PNG/JPEG) to a single PDF page (cropped to fill page, no margins)."""
-    buffer = io.BytesIO()
+    The JPEG is rotated per its EXIF orientation and scaled to cover the page; the
+    page edges crop the overflow, matching the cover mode of draw_image_page.
+    """
+    page_width, page_height = letter
+    rotation = JPEG_ROTATIONS[image.getexif().get(EXIF_ORIENTATION_TAG, 1)]
+
+    img_width, img_height = image.size
+    upright_width, upright_height = (img_height, img_width) if rotation in (90, -90) else (img_width, img_height)
+    scale = max(page_width / upright_width, page_height / upright_height)
+    draw_width, draw_height = img_width * scale, img_height * scale
+
+    c.translate(page_width / 2, page_height / 2)
+    c.rotate(rotation)
+    c.drawImage(JpegPassthroughReader(io.BytesIO(image_bytes)), -draw_width / 2, -draw_height / 2,
+                width=draw_width, height=draw_height)
+    c.showPage()
+
+
+def prepare_page_image(image_bytes):
+    """Decode one image (PNG/JPEG) and crop it to fill the page (no margins).
+
+    JPEGs that can be embedded directly are returned as opened, still undecoded.
+    """
     image = Image.open(io.BytesIO(image_bytes))
+
+    # Most JPEGs can be embedded directly; Image.open has only read the header so far
+    if (
+        image.format == "JPEG"
+        and image.mode in ("RGB", "L")
+        and image.getexif().get(EXIF_ORIENTATION_TAG, 1) in JPEG_ROTATIONS
+    ):
+        return image
+
+    # Other JPEGs have to be decoded; let libjpeg scale them down by 1/2, 1/4 or 1/8
+    # while decoding, keeping at least DRAFT_DPI across the page
+    if image.format == "JPEG":
+        page_width, page_height = letter
+        upright_width, upright_height = image.size
+        if image.getexif().get(EXIF_ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+            upright_width, upright_height = upright_height, upright_width
+        scale = max(page_width / upright_width, page_height / upright_height) * DRAFT_DPI / 72
+        image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
     
     # Fix orientation based on EXIF data
     image = ImageOps.exif_transpose(image)
@@ -165,40 +261,58 @@ def image_to_pdf_page(image_bytes):
     # Convert image to RGB if needed (ReportLab requires RGB)
     if image.mode == "RGBA":
         background = Image.new("RGB", image.size, (255, 255, 255))
-        background.paste(image, mask=image.split()[-1])
+        # An RGBA image used as a mask contributes its alpha band; split() would copy all four bands
+        background.paste(image, mask=image)
         image = background
     elif image.mode not in ("RGB", "L"):
         image = image.convert("RGB")
-    
+    return image
+
+
+def draw_image_page(c, image, image_bytes):
+    """Draw an image from prepare_page_image as a page of canvas c."""
+    # Cropped and converted images are new Image objects without a format
+    if image.format == "JPEG":
+        draw_jpeg_page(c, image, image_bytes)
+        return
+
     # Draw image at full page size (no margins)
-    c = canvas.Canvas(buffer, pagesize=letter)
-    c.drawImage(ImageReader(image), 0, 0, width=usable_width, height=usable_height, preserveAspectRatio=True)
-    c.save()
-    buffer.seek(0)
-    return buffer
+    page_width, page_height = letter
+    c.drawImage(ImageReader(image), 0, 0, width=page_width, height=page_height, preserveAspectRatio=True)
+    c.showPage()
+
+
+def iter_page_images(file_info_list):
+    """Yield (info, prepared image) in order, preparing up to MAX_WORKERS images ahead."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = deque()
+        for info in file_info_list:
+            pending.append((info, executor.submit(prepare_page_image, info["file_bytes"])))
+            if len(pending) > MAX_WORKERS:
+                info, future = pending.popleft()
+                yield info, future.result()
+        while pending:
+            info, future = pending.popleft()
+            yield info, future.result()
 
 
 def merge_images_to_pdf(file_info_list, include_cover=True):
-    """Merge image infos into a single PDF; optionally add a cover page."""
-    writer = PdfWriter()
+    """Merge image infos into a single PDF's bytes; optionally add a cover page."""
+    # Every page is drawn on one canvas, so the PDF is written once at the end
+    # instead of being built page by page and re-parsed. No output file is given:
+    # getpdfdata() returns the bytes ReportLab builds anyway, without copying them
+    # into a buffer and back out again.
+    c = canvas.Canvas(None, pagesize=letter)
 
     if include_cover and file_info_list:
         generation_date = datetime.now()
-        cover_buffer = create_cover_page(file_info_list, generation_date)
-        cover_reader = PdfReader(cover_buffer)
-        for page in cover_reader.pages:
-            writer.add_page(page)
+        draw_cover_page(c, file_info_list, generation_date)
 
-    for info in file_info_list:
-        image_pdf_buffer = image_to_pdf_page(info["file_bytes"])
-        reader = PdfReader(image_pdf_buffer)
-        for page in reader.pages:
-            writer.add_page(page)
+    # Decoding runs in worker threads; drawing stays on this thread and in page order
+    for info, image in iter_page_images(file_info_list):
+        draw_image_page(c, image, info["file_bytes"])
 
-    output_buffer = io.BytesIO()
-    writer.write(output_buffer)
-    output_buffer.seek(0)
-    return output_buffer
+    return c.getpdfdata()
 
 
 # --- Streamlit UI ---
@@ -224,22 +338,43 @@ uploaded_files = st.file_uploader(
 
 if uploaded_files:
     current_filenames = [f.name for f in uploaded_files]
-    existing_filenames = [f["filename"] for f in st.session_state.processed_files]
-    new_files = [f for f in uploaded_files if f.name not in existing_filenames]
+    # Files are identified by name and content, so different files sharing a name (e.g.
+    # "image.jpg" from iOS) are all kept. An entry whose name is still in the uploader but
+    # whose content no longer is was replaced by an edited image and is dropped.
+    upload_keys = {(f.name, upload_hash(f.file_id, f)): f for f in uploaded_files}
+    upload_names = {name for name, _ in upload_keys}
+    st.session_state.processed_files = [
+        f for f in st.session_state.processed_files
+        if f["filename"] not in upload_names or (f["filename"], f["hash"]) in upload_keys
+    ]
+    existing_keys = {(f["filename"], f["hash"]) for f in st.session_state.processed_files}
+    new_files = [f for key, f in upload_keys.items() if key not in existing_keys]
 
     if new_files:
         with st.spinner(f"Processing {len(new_files)} new file(s)…"):
-            for uploaded_file in new_files:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = [
+                    executor.submit(extract_image_metadata, uploaded_file, uploaded_file.name)
+                    for uploaded_file in new_files
+                ]
+            added, errors = [], []
+            for uploaded_file, future in zip(new_files, futures):
                 try:
-                    info = extract_image_metadata(uploaded_file, uploaded_file.name)
+                    info = future.result()
                     if "error" not in info:
                         st.session_state.processed_files.append(info)
-                        st.success(f"✅ Added: {uploaded_file.name}")
+                        added.append(uploaded_file.name)
                     else:
-                        st.error(f"❌ Error reading {uploaded_file.name}: {info['error']}")
+                        errors.append(f"❌ Error reading {uploaded_file.name}: {info['error']}")
                 except Exception as e:
-                    st.error(f"❌ Failed to process {uploaded_file.name}: {str(e)}")
-                time.sleep(0.1)
+                    errors.append(f"❌ Failed to process {uploaded_file.name}: {str(e)}")
+
+        # Streamlit elements must be created from the script thread; one message each for
+        # successes and failures, however many files were uploaded
+        if added:
+            st.success(f"✅ Added {len(added)} file(s): {', '.join(added)}")
+        if errors:
+            st.error("\n\n".join(errors))
 
 if st.session_state.processed_files:
     st.success(f"✅ {len(st.session_state.processed_files)} image(s) ready to merge")
@@ -263,7 +398,7 @@ if st.session_state.processed_files:
                 if st.button("🗑️", key=f"remove_img_{idx}", help="Remove this image"):
                     st.session_state.processed_files = [
                         f for f in st.session_state.processed_files
-                        if f["filename"] != info["filename"]
+                        if (f["filename"], f["hash"]) != (info["filename"], info["hash"])
                     ]
                     st.session_state.merged_pdf_bytes = None
                     st.session_state.merged_pdf_filename = None
@@ -283,10 +418,10 @@ if st.session_state.processed_files:
     if st.button("🔗 Merge to PDF", type="primary", use_container_width=True):
         with st.spinner("Merging images into PDF…"):
             try:
-                merged_buffer = merge_images_to_pdf(sorted_files, include_cover=include_cover)
+                merged_pdf_bytes = merge_images_to_pdf(sorted_files, include_cover=include_cover)
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"images_to_pdf_{timestamp}.pdf"
-                st.session_state.merged_pdf_bytes = merged_buffer.getvalue()
+                st.session_state.merged_pdf_bytes = merged_pdf_bytes
                 st.session_state.merged_pdf_filename = filename
                 st.rerun()
             except Exception as e:
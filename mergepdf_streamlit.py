@@ -1,49 +1,72 @@
 import streamlit as st
-from PyPDF2 import PdfReader, PdfWriter
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from datetime import datetime
+import hashlib
 import io
 import os
+import re
+
+# PDF dates are in format: D:YYYYMMDDHHmmSS; only the date part is used
+_PDF_DATE_RE = re.compile(r'D:(\d{4})(\d{2})(\d{2})')
+
+def count_pdf_pages(reader):
+    """Page count from the page tree's /Count, without loading every page object"""
+    try:
+        count = reader.trailer['/Root']['/Pages']['/Count']
+        if isinstance(count, int) and count >= 0:
+            return int(count)
+    except Exception:
+        pass
+    return len(reader.pages)
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def upload_hash(file_id, _uploaded_file):
+    """SHA-256 of an uploaded file's bytes (cached per upload so reruns don't rehash it)"""
+    return hashlib.sha256(_uploaded_file.getvalue()).hexdigest()
 
 def extract_pdf_metadata(pdf_file):
     """Extract metadata and page count from PDF"""
     try:
-        pdf_file.seek(0)
-        reader = PdfReader(pdf_file)
-        metadata = reader.metadata
-        
-        # Try to extract date from metadata
-        date = None
-        if metadata:
-            # Check various date fields
-            date_fields = ['/CreationDate', '/ModDate']
-            for field in date_fields:
-                if field in metadata and metadata[field]:
-                    date_str = metadata[field]
-                    # PDF dates are in format: D:YYYYMMDDHHmmSS
-                    if date_str.startswith('D:'):
-                        date_str = date_str[2:10]
-                        try:
-                            date = datetime.strptime(date_str, '%Y%m%d')
-                            break
-                        except:
-                            pass
-        
-        title = metadata.get('/Title', '') if metadata else ''
-        author = metadata.get('/Author', '') if metadata else ''
-        
-        return {
-            'title': title if title else pdf_file.name,
-            'author': author,
-            'date': date,
-            'pages': len(reader.pages),
-            'file_obj': pdf_file
-        }
+        content_hash = upload_hash(pdf_file.file_id, pdf_file)
+        info = _extract_pdf_metadata(pdf_file.getvalue(), pdf_file.name, content_hash)
     except Exception as e:
         st.error(f"Error reading {pdf_file.name}: {str(e)}")
         return None
+    return {**info, 'file_obj': pdf_file}
+
+@st.cache_data(show_spinner=False)
+def _extract_pdf_metadata(_pdf_bytes, filename, content_hash):
+    """Extract metadata and page count from PDF bytes (cached by content hash, so reruns skip parsing)"""
+    reader = PdfReader(io.BytesIO(_pdf_bytes))
+    metadata = reader.metadata
+    
+    # Try to extract date from metadata
+    date = None
+    if metadata:
+        # Check various date fields
+        date_fields = ['/CreationDate', '/ModDate']
+        for field in date_fields:
+            if field in metadata and metadata[field]:
+                match = _PDF_DATE_RE.match(str(metadata[field]))
+                if match:
+                    try:
+                        date = datetime(*map(int, match.groups()))
+                        break
+                    except ValueError:
+                        pass
+    
+    title = str(metadata.get('/Title', '')) if metadata else ''
+    author = str(metadata.get('/Author', '')) if metadata else ''
+    
+    return {
+        'title': title if title else filename,
+        'author': author,
+        'date': date,
+        'pages': count_pdf_pages(reader)
+    }
 
 def create_cover_page(pdf_info_list, generation_date):
     """Create a cover page PDF with document details"""
@@ -114,22 +137,19 @@ def merge_pdfs_with_cover(pdf_info_list):
     # Create and add cover page
     generation_date = datetime.now()
     cover_buffer = create_cover_page(pdf_info_list, generation_date)
-    cover_reader = PdfReader(cover_buffer)
-    for page in cover_reader.pages:
-        writer.add_page(page)
+    writer.append(cover_buffer)
     
     # Add all PDFs in order
+    # append copies each document's page tree in one pass; outlines are left
+    # out so the result matches a page-by-page copy
     for info in pdf_info_list:
         info['file_obj'].seek(0)
-        reader = PdfReader(info['file_obj'])
-        for page in reader.pages:
-            writer.add_page(page)
+        writer.append(info['file_obj'], import_outline=False)
     
     # Write to buffer
     output_buffer = io.BytesIO()
     writer.write(output_buffer)
-    output_buffer.seek(0)
-    return output_buffer
+    return output_buffer.getvalue()
 
 # Streamlit UI
 st.set_page_config(page_title="PDF Merger", page_icon="📄", layout="wide")
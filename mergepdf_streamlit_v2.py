@@ -2,7 +2,7 @@ import streamlit as st
 
 # Check for required packages
 try:
-    from PyPDF2 import PdfReader, PdfWriter
+    from pypdf import PdfReader, PdfWriter
     from reportlab.lib.pagesizes import letter
     from reportlab.pdfgen import canvas
     from reportlab.lib.units import inch
@@ -12,8 +12,9 @@ except ImportError as e:
     MISSING_PACKAGE = str(e)
 
 from datetime import datetime
+import hashlib
 import io
-import time
+import re
 
 if not DEPENDENCIES_AVAILABLE:
     st.error("⚠️ Missing Required Packages")
@@ -21,13 +22,13 @@ if not DEPENDENCIES_AVAILABLE:
     This app requires additional packages. Please create a `requirements.txt` file in your app directory with:
     
     ```
-    PyPDF2==3.0.1
+    pypdf==6.20.0
     reportlab==4.0.7
     ```
     
     **For local use:**
     ```bash
-    pip install PyPDF2 reportlab
+    pip install pypdf reportlab
     ```
     
     **For Streamlit Cloud:**
@@ -35,14 +36,40 @@ if not DEPENDENCIES_AVAILABLE:
     """)
     st.stop()
 
+# PDF dates are in format: D:YYYYMMDDHHmmSS; only the date part is used
+_PDF_DATE_RE = re.compile(r'D:(\d{4})(\d{2})(\d{2})')
+
+def count_pdf_pages(reader):
+    """Page count from the page tree's /Count, without loading every page object"""
+    try:
+        count = reader.trailer['/Root']['/Pages']['/Count']
+        if isinstance(count, int) and count >= 0:
+            return int(count)
+    except Exception:
+        pass
+    return len(reader.pages)
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def upload_hash(file_id, _uploaded_file):
+    """SHA-256 of an uploaded file's bytes (cached per upload so reruns don't rehash it)"""
+    return hashlib.sha256(_uploaded_file.getvalue()).hexdigest()
+
 def extract_pdf_metadata(pdf_file, filename):
     """Extract metadata and page count from PDF"""
+    pdf_bytes = pdf_file.getvalue()
+    content_hash = upload_hash(pdf_file.file_id, pdf_file)
+    info = _extract_pdf_metadata(pdf_bytes, filename, content_hash)
+    if 'error' in info:
+        return info
+    
+    # Keep the upload itself rather than a copy of its bytes; the merge reads it again
+    return {**info, 'file_obj': pdf_file, 'hash': content_hash}
+
+@st.cache_data(show_spinner=False)
+def _extract_pdf_metadata(_pdf_bytes, filename, content_hash):
+    """Extract metadata and page count from PDF bytes (cached by content hash; excludes the bytes)"""
     try:
-        pdf_file.seek(0)
-        pdf_bytes = pdf_file.read()
-        pdf_file.seek(0)
-        
-        reader = PdfReader(io.BytesIO(pdf_bytes))
+        reader = PdfReader(io.BytesIO(_pdf_bytes))
         metadata = reader.metadata
         
         # Try to extract date from metadata
@@ -52,14 +79,12 @@ def extract_pdf_metadata(pdf_file, filename):
             date_fields = ['/CreationDate', '/ModDate']
             for field in date_fields:
                 if field in metadata and metadata[field]:
-                    date_str = str(metadata[field])
-                    # PDF dates are in format: D:YYYYMMDDHHmmSS
-                    if date_str.startswith('D:'):
-                        date_str = date_str[2:10]
+                    match = _PDF_DATE_RE.match(str(metadata[field]))
+                    if match:
                         try:
-                            date = datetime.strptime(date_str, '%Y%m%d')
+                            date = datetime(*map(int, match.groups()))
                             break
-                        except:
+                        except ValueError:
                             pass
         
         title = str(metadata.get('/Title', '')) if metadata else ''
@@ -69,8 +94,7 @@ def extract_pdf_metadata(pdf_file, filename):
             'title': title if title else filename,
             'author': author,
             'date': date,
-            'pages': len(reader.pages),
-            'file_bytes': pdf_bytes,
+            'pages': count_pdf_pages(reader),
             'filename': filename
         }
     except Exception as e:
@@ -148,21 +172,19 @@ def merge_pdfs_with_cover(pdf_info_list):
     # Create and add cover page
     generation_date = datetime.now()
     cover_buffer = create_cover_page(pdf_info_list, generation_date)
-    cover_reader = PdfReader(cover_buffer)
-    for page in cover_reader.pages:
-        writer.add_page(page)
+    writer.append(cover_buffer)
     
     # Add all PDFs in order
+    # append copies each document's page tree in one pass; outlines are left
+    # out so the result matches a page-by-page copy
     for info in pdf_info_list:
-        reader = PdfReader(io.BytesIO(info['file_bytes']))
-        for page in reader.pages:
-            writer.add_page(page)
+        info['file_obj'].seek(0)
+        writer.append(info['file_obj'], import_outline=False)
     
     # Write to buffer
     output_buffer = io.BytesIO()
     writer.write(output_buffer)
-    output_buffer.seek(0)
-    return output_buffer
+    return output_buffer.getvalue()
 
 # Streamlit UI
 st.set_page_config(page_title="PDF Merger", page_icon="📄", layout="wide")
@@ -187,24 +209,38 @@ uploaded_files = st.file_uploader(
 if uploaded_files:
     # Get list of new files
     current_filenames = [f.name for f in uploaded_files]
-    existing_filenames = [f['filename'] for f in st.session_state.processed_files]
     
-    # Check for new files
-    new_files = [f for f in uploaded_files if f.name not in existing_filenames]
+    # Files are identified by name and content, so different files sharing a name (e.g.
+    # scans all saved as "scan.pdf") are all kept. An entry whose name is still in the uploader but
+    # whose content no longer is was replaced by an edited PDF and is dropped.
+    upload_keys = {(f.name, upload_hash(f.file_id, f)): f for f in uploaded_files}
+    upload_names = {name for name, _ in upload_keys}
+    st.session_state.processed_files = [
+        f for f in st.session_state.processed_files
+        if f['filename'] not in upload_names or (f['filename'], f['hash']) in upload_keys
+    ]
+    existing_keys = {(f['filename'], f['hash']) for f in st.session_state.processed_files}
+    new_files = [f for key, f in upload_keys.items() if key not in existing_keys]
     
     if new_files:
+        added, errors = [], []
         with st.spinner(f"Processing {len(new_files)} new file(s)..."):
             for pdf_file in new_files:
                 try:
                     info = extract_pdf_metadata(pdf_file, pdf_file.name)
                     if 'error' not in info:
                         st.session_state.processed_files.append(info)
-                        st.success(f"✅ Added: {pdf_file.name}")
+                        added.append(pdf_file.name)
                     else:
-                        st.error(f"❌ Error reading {pdf_file.name}: {info['error']}")
+                        errors.append(f"❌ Error reading {pdf_file.name}: {info['error']}")
                 except Exception as e:
-                    st.error(f"❌ Failed to process {pdf_file.name}: {str(e)}")
-                time.sleep(0.1)  # Small delay to prevent overwhelming mobile devices
+                    errors.append(f"❌ Failed to process {pdf_file.name}: {str(e)}")
+        
+        # One message each for successes and failures, however many files were uploaded
+        if added:
+            st.success(f"✅ Added {len(added)} file(s): {', '.join(added)}")
+        if errors:
+            st.error("\n\n".join(errors))
 
 # Display current files
 if st.session_state.processed_files:
@@ -232,7 +268,7 @@ if st.session_state.processed_files:
                 if st.button("🗑️", key=f"remove_{idx}", help="Remove this file"):
                     st.session_state.processed_files = [
                         f for f in st.session_state.processed_files 
-                        if f['filename'] != info['filename']
+                        if (f['filename'], f['hash']) != (info['filename'], info['hash'])
                     ]
                     st.rerun()
     